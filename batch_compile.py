@@ -10,6 +10,10 @@ be executed.
 If errors occur in the code generation phase, will normally be output to the
 console only.
 
+Large batches on multi-core machines are compiled in parallel, one file per
+worker process; output files and console messages are produced by the parent
+process. Small batches are compiled in-process, avoiding pool startup costs.
+
 Author: Greg Phillips
 
 Version: 2022-03-14
@@ -17,44 +21,89 @@ Version: 2022-03-14
 
 import os
 import sys
+from concurrent.futures import ProcessPoolExecutor
 
-from antlr4 import ParseTreeWalker
-from generic_parser import parse, SyntaxErrors
+from generic_parser import parse, SyntaxErrors, IterativeParseTreeWalker
 from nimble import NimbleParser, NimbleLexer
 from nimble2MIPS import MIPSGenerator
 from semantics import do_semantic_analysis, NimbleSemanticErrors
 
 
+# below this many files, starting a process pool costs more than it saves
+_MIN_FILES_FOR_POOL = 16
+
+
+def _compile_one(name, nimble_filename):
+    """
+    Compiles a single Nimble source file, returning a `(name, output, error_found)`
+    tuple rather than writing anything itself, so that it can run either in-process
+    or in a worker process.
+    """
+    error_found = False
+    output = ''
+    try:
+        tree = parse(nimble_filename, 'script', NimbleLexer, NimbleParser, from_file=True)
+        do_semantic_analysis(tree)
+        IterativeParseTreeWalker().walk(MIPSGenerator(), tree)
+        output = tree.mips
+    except FileNotFoundError as fnf:
+        output = fnf
+        error_found = True
+    except SyntaxErrors as se:
+        output = f'\nSyntax error(s) in {name}\n{se}'
+        error_found = True
+    except NimbleSemanticErrors as nse:
+        output = f'\nSemantic error(s) in {name}\n{nse}'
+        error_found = True
+    return name, output, error_found
+
+
+def _write_results(names, results, output_dir):
+    """
+    Writes each `(name, output, error_found)` result to its .asm file as it arrives,
+    yielding the error message for each result that has one. `results` must be in the
+    same order as `names`. If compiling a file raises an unexpected exception, an empty
+    .asm file is still written for it, replacing any stale output, before the exception
+    propagates.
+    """
+    results = iter(results)
+    for name in names:
+        output, error_found = '', False
+        try:
+            _, output, error_found = next(results)
+        finally:
+            mips_filename = os.path.join(output_dir, f'{os.path.splitext(name)[0]}.asm')
+            with open(mips_filename, 'wb', buffering=1 << 20) as mf:
+                mf.write(str(output).encode())
+        if error_found:
+            yield f'{output}\n'
+
+
 def compile_nimble_source_files():
     source_dir = os.path.join(os.getcwd(), 'nimble_source')
     output_dir = os.path.join(os.getcwd(), 'generated_mips')
     if not os.path.exists(output_dir):
         os.makedirs(output_dir)
-    source_files = os.listdir(source_dir)
-    for name in source_files:
-        error_found = False
-        output = ''
-        try:
-            nimble_filename = os.path.join(source_dir, name)
-            tree = parse(nimble_filename, 'script', NimbleLexer, NimbleParser, from_file=True)
-            do_semantic_analysis(tree)
-            ParseTreeWalker().walk(MIPSGenerator(), tree)
-            output = tree.mips
-        except FileNotFoundError as fnf:
-            output = fnf
-            error_found = True
-        except SyntaxErrors as se:
-            output = f'\nSyntax error(s) in {name}\n{se}'
-            error_found = True
-        except NimbleSemanticErrors as nse:
-            output = f'\nSemantic error(s) in {name}\n{nse}'
-            error_found = True
-        finally:
-            if error_found:
-                print(output, file=sys.stderr)
-            mips_filename = os.path.join(output_dir, f'{name.split(".")[0]}.asm')
-            with open(mips_filename, 'w') as mf:
-                mf.write(output)
+    with os.scandir(source_dir) as it:
+        source_files = [entry for entry in it
+                        if entry.is_file() and entry.name.endswith('.nimble')]
+    names = [entry.name for entry in source_files]
+    paths = [entry.path for entry in source_files]
+    use_pool = (os.cpu_count() or 1) > 1 and len(source_files) >= _MIN_FILES_FOR_POOL
+    errors = []
+    try:
+        if use_pool:
+            # files share no state, so each is compiled in its own process
+            with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+                results = executor.map(_compile_one, names, paths)
+                for error in _write_results(names, results, output_dir):
+                    errors.append(error)
+        else:
+            for error in _write_results(names, map(_compile_one, names, paths), output_dir):
+                errors.append(error)
+    finally:
+        # report errors already found, even if a later file fails unexpectedly
+        sys.stderr.write(''.join(errors))
 
 
 if __name__ == '__main__':
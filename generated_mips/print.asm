@@ -6,7 +6,6 @@ false_string: .asciiz "false"
 string_0: .asciiz "\nhello, world\n"
 string_1: .asciiz "1\tafter-tab '~ 6\" 7\\ \" "
 string_2: .asciiz "\n"
-string_3: .asciiz "\n"
 
 .text
 
@@ -46,7 +45,7 @@ jal    true_false_string
 li     $v0 4
 syscall
 
-la     $t0 string_3
+la     $t0 string_2
 move   $a0 $t0
 li     $v0 4
 syscall
@@ -1,6 +1,7 @@
 """
 Provides a generic `parse` function which either returns a parse tree or
-raises a `SyntaxErrors` exception with a `SyntaxErrorLog`.
+raises a `SyntaxErrors` exception with a `SyntaxErrorLog`, and an
+`IterativeParseTreeWalker` for walking parse trees without recursion.
 
 Author: Greg Phillips
 
@@ -10,7 +11,8 @@ Version: 2021-01-24
 from dataclasses import dataclass
 
 from antlr4 import FileStream, InputStream, CommonTokenStream,\
-    Recognizer, RecognitionException, Token
+    Recognizer, RecognitionException, Token, ParseTreeListener, ParseTreeWalker, ErrorNode,\
+    TerminalNode
 
 
 def parse(source_or_path, start_rule_name, lexer_class, parser_class, from_file=False):
@@ -104,3 +106,84 @@ class SyntaxErrorLog:
 
     def __repr__(self):
         return '\n'.join([str(e) for e in self.syntax_errors])
+
+
+_NOOP_ENTER_EVERY_RULE = ParseTreeListener.enterEveryRule
+_NOOP_EXIT_EVERY_RULE = ParseTreeListener.exitEveryRule
+_NOOP_VISIT_TERMINAL = ParseTreeListener.visitTerminal
+_UNKNOWN = object()  # marks a context class not yet in a walk's method cache
+
+
+def _rule_method(listener, prefix, context_class):
+    """
+    Returns the listener's method for entering or exiting nodes of context_class (e.g.,
+    `exitAddSub` for `AddSubContext`), or None if it has none.
+    """
+    rule_name = context_class.__name__
+    if rule_name.endswith('Context'):
+        rule_name = rule_name[:-len('Context')]
+    return getattr(listener, prefix + rule_name, None)
+
+
+class IterativeParseTreeWalker(ParseTreeWalker):
+    """
+    A drop-in replacement for ANTLR's `ParseTreeWalker`, firing the same listener events
+    in the same order, but driven by a single loop over an explicit stack rather than a
+    recursive call per node. Children are pushed by index, and a `None` marker above each
+    rule node on the stack signals that its exit events are due.
+
+    Rather than have each node look up its rule-specific `enterX`/`exitX` method on the
+    listener (as the generated `enterRule`/`exitRule` methods do), the bound methods are
+    looked up once per context class and walk, and called directly.
+    """
+
+    def walk(self, listener, t):
+        enter_methods = {}
+        exit_methods = {}
+        # skip the generic hooks entirely when the listener leaves them as no-ops
+        listener_class = type(listener)
+        enter_every_rule = (None if listener_class.enterEveryRule is _NOOP_ENTER_EVERY_RULE
+                            else listener.enterEveryRule)
+        exit_every_rule = (None if listener_class.exitEveryRule is _NOOP_EXIT_EVERY_RULE
+                           else listener.exitEveryRule)
+        visit_terminal = (None if listener_class.visitTerminal is _NOOP_VISIT_TERMINAL
+                          else listener.visitTerminal)
+        stack = [t]
+        push = stack.append
+        pop = stack.pop
+        while stack:
+            node = pop()
+            if node is None:
+                node = pop()
+                context_class = node.__class__
+                method = exit_methods.get(context_class, _UNKNOWN)
+                if method is _UNKNOWN:
+                    method = exit_methods[context_class] = _rule_method(listener, 'exit',
+                                                                        context_class)
+                if method is not None:
+                    method(node)
+                if exit_every_rule is not None:
+                    exit_every_rule(node)
+            elif isinstance(node, TerminalNode):
+                if isinstance(node, ErrorNode):
+                    listener.visitErrorNode(node)
+                elif visit_terminal is not None:
+                    visit_terminal(node)
+            else:
+                if enter_every_rule is not None:
+                    enter_every_rule(node)
+                context_class = node.__class__
+                method = enter_methods.get(context_class, _UNKNOWN)
+                if method is _UNKNOWN:
+                    method = enter_methods[context_class] = _rule_method(listener, 'enter',
+                                                                         context_class)
+                if method is not None:
+                    method(node)
+                push(node)
+                push(None)
+                children = node.children
+                if children:
+                    i = len(children)
+                    while i:
+                        i -= 1
+                        push(children[i])
@@ -12,12 +12,41 @@ import templates
 from nimble import NimbleListener, NimbleParser
 from semantics import PrimitiveType
 
+_ADDSUB_OP = {'+': 'add', '-': 'sub'}
+
+
+def separated(fragment_lists, separator):
+    """Returns a fragment list with `separator` between each of the given fragments."""
+    fragments = []
+    for fragment_list in fragment_lists:
+        if fragments:
+            fragments.append(separator)
+        fragments.append(fragment_list)
+    return fragments
+
+
+def flatten(fragments):
+    """Yields the strings in a nested fragment list, in order, without recursion."""
+    stack = [iter(fragments)]
+    while stack:
+        for fragment in stack[-1]:
+            if isinstance(fragment, list):
+                stack.append(iter(fragment))
+                break
+            yield fragment
+        else:
+            stack.pop()
+
 
 class MIPSGenerator(NimbleListener):
+    """
+    Each node's generated code is stored in its `mips` attribute as a (nested) list of
+    string fragments. Only the script node's `mips` is joined into a single string.
+    """
 
     def __init__(self):
         self.label_index = -1
-        self.string_literals = {}
+        self.string_literals = {}  # maps literal text to its label, so each is stored once
         self.current_scope = None
 
     def unique_label(self, base):
@@ -26,7 +55,7 @@ class MIPSGenerator(NimbleListener):
         where the x is a unique integer. Useful for generating unique labels.
         """
         self.label_index += 1
-        return f'{base}_{self.label_index}'
+        return base + '_' + str(self.label_index)
 
     # ---------------------------------------------------------------------------------
     # Provided for you
@@ -36,42 +65,46 @@ class MIPSGenerator(NimbleListener):
         self.current_scope = ctx.scope
 
     def exitScript(self, ctx: NimbleParser.ScriptContext):
-        ctx.mips = templates.script.format(
-            string_literals='\n'.join(f'{label}: .asciiz {string}'
-                                      for label, string in self.string_literals.items()),
+        ctx.mips = ''.join(flatten(templates.script(
+            string_literals=separated((f'{label}: .asciiz {string}'
+                                       for string, label in self.string_literals.items()), '\n'),
             main=ctx.main().mips
-        )
+        )))
 
     def exitMain(self, ctx: NimbleParser.MainContext):
         ctx.mips = ctx.body().mips
 
     def exitBlock(self, ctx: NimbleParser.BlockContext):
-        ctx.mips = '\n'.join(s.mips for s in ctx.statement())
+        ctx.mips = separated((s.mips for s in ctx.statement()), '\n')
 
     def exitBoolLiteral(self, ctx: NimbleParser.BoolLiteralContext):
         value = 1 if ctx.BOOL().getText() == 'true' else 0
-        ctx.mips = 'li     $t0 {}'.format(value)
+        ctx.mips = ['li     $t0 {}'.format(value)]
 
     def exitIntLiteral(self, ctx: NimbleParser.IntLiteralContext):
-        ctx.mips = 'li     $t0 {}'.format(ctx.INT().getText())
+        ctx.mips = ['li     $t0 {}'.format(ctx.INT().getText())]
 
     def exitStringLiteral(self, ctx: NimbleParser.StringLiteralContext):
-        label = self.unique_label('string')
-        self.string_literals[label] = ctx.getText()
-        ctx.mips = 'la     $t0 {}'.format(label)
+        text = ctx.STRING().getText()
+        label = self.string_literals.get(text)
+        if label is None:
+            label = self.unique_label('string')
+            self.string_literals[text] = label
+        ctx.mips = ['la     $t0 {}'.format(label)]
 
     def exitPrint(self, ctx: NimbleParser.PrintContext):
         """
         Bool values have to be handled separately, because we print 'true' or 'false'
         but the values are encoded as 1 or 0
         """
-        if ctx.expr().type == PrimitiveType.Bool:
-            ctx.mips = templates.print_bool.format(expr=ctx.expr().mips)
+        expr = ctx.expr()
+        if expr.type == PrimitiveType.Bool:
+            ctx.mips = templates.print_bool(expr=expr.mips)
         else:
             # in the SPIM print syscall, 1 is the service code for Int, 4 for String
-            ctx.mips = templates.print_int_or_string.format(
-                expr=ctx.expr().mips,
-                service_code=1 if ctx.expr().type == PrimitiveType.Int else 4
+            ctx.mips = templates.print_int_or_string(
+                expr=expr.mips,
+                service_code=1 if expr.type == PrimitiveType.Int else 4
             )
 
     # ---------------------------------------------------------------------------------
@@ -84,15 +117,16 @@ class MIPSGenerator(NimbleListener):
 
     def exitAddSub(self, ctx: NimbleParser.AddSubContext):
         # TODO: extend for String concatenation
-        ctx.mips = templates.add_sub.format(
-            operation='add' if ctx.op.text == '+' else 'sub',
-            expr0=ctx.expr(0).mips,
-            expr1=ctx.expr(1).mips
+        expr0, expr1 = ctx.expr()
+        ctx.mips = templates.add_sub(
+            operation=_ADDSUB_OP[ctx.op.text],
+            expr0=expr0.mips,
+            expr1=expr1.mips
         )
 
     def exitIf(self, ctx: NimbleParser.IfContext):
         # TODO: extend to support `else`
-        ctx.mips = templates.if_.format(
+        ctx.mips = templates.if_(
             condition=ctx.expr().mips,
             true_block=ctx.block(0).mips,
             endif_label=self.unique_label('endif')
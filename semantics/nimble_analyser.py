@@ -1,6 +1,6 @@
-from antlr4 import ParseTreeWalker
+from generic_parser import IterativeParseTreeWalker
 from .errorlog import ErrorLog
-from .nimblesemantics import InferTypesAndCheckConstraints, DefineScopesAndSymbols
+from .nimblesemantics import SemanticPass
 
 
 class NimbleSemanticErrors(Exception):
@@ -14,9 +14,7 @@ class NimbleSemanticErrors(Exception):
 
 def do_semantic_analysis(tree):
     errors = ErrorLog()
-    walker = ParseTreeWalker()
-    walker.walk(DefineScopesAndSymbols(errors), tree)
-    walker.walk(InferTypesAndCheckConstraints(errors), tree)
+    IterativeParseTreeWalker().walk(SemanticPass(errors), tree)
     if errors.total_entries():
         raise NimbleSemanticErrors(errors)
     else:
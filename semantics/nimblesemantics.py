@@ -21,17 +21,60 @@ There are two phases to the analysis: 1. DefineScopesAndSymbols, and
 In the first phase, `symboltable.Scope` objects are created for all scope-defining parse
 tree nodes, here the script and the main. These are monkey-patched onto the tree nodes
 as `scope` attributes. Also in this phase, all declared variable types are recorded in
-the appropriate scope (here the main scope). Restrictions on duplicate definitions are
-enforced.
+the appropriate scope (here the main scope), and each varDec node is annotated with its
+`var_name` and `declared_type` so they needn't be recomputed. Restrictions on duplicate
+definitions are enforced.
 
 In the second phase, type inference is performed and all other semantic constraints are
 checked.
+
+`SemanticPass` performs both phases in a single walk of the tree. This is possible because
+every variable is declared in the varBlock preceding the statements that use it, so each
+name is defined by the time any statement referring to it is exited.
+
+As a language rule, a variable initializer may only refer to variables declared by earlier
+varDecs. An initializer referring to the variable being declared, or to one declared after
+it (e.g., `var x : Int = x`), is an UNDEFINED_NAME error. `SemanticPass` enforces this
+naturally, since an initializer is checked before its own varDec defines its name; running
+the two phases as separate walks does not, and is kept only for testing phase 1 alone.
 """
 
 from .errorlog import ErrorLog, Category
 from nimble import NimbleListener, NimbleParser
 from .symboltable import Scope, PrimitiveType
 
+# module-level aliases, avoiding an attribute lookup on PrimitiveType for every check
+_INT = PrimitiveType.Int
+_BOOL = PrimitiveType.Bool
+_STRING = PrimitiveType.String
+_VOID = PrimitiveType.Void
+_ERROR = PrimitiveType.ERROR
+
+
+# The typing rules for operators are kept free of parse tree nodes, taking only
+# operator text and operand types; the listener methods below just adapt them.
+
+# unary operators map to the only operand type they accept, which is also their result type
+_NEG_OPERAND_TYPE = {'-': _INT, '!': _BOOL}
+
+
+def negation_type(op, operand_type):
+    """The type resulting from applying unary `op` to an operand of the given type."""
+    expected_type = _NEG_OPERAND_TYPE.get(op)
+    return expected_type if operand_type == expected_type else _ERROR
+
+
+def binary_type(op, left_type, right_type, int_result_type):
+    """
+    The type resulting from applying binary `op` to operands of the given types, where
+    `int_result_type` is the result of applying `op` to two Ints.
+    """
+    if left_type == _INT and right_type == _INT:
+        return int_result_type
+    elif op == '+' and left_type == _STRING and right_type == _STRING:
+        return _STRING
+    return _ERROR
+
 
 class DefineScopesAndSymbols(NimbleListener):
 
@@ -40,7 +83,7 @@ class DefineScopesAndSymbols(NimbleListener):
         self.current_scope = None
 
     def enterScript(self, ctx: NimbleParser.ScriptContext):
-        global_scope = Scope('$global', PrimitiveType.Void, None)
+        global_scope = Scope('$global', _VOID, None)
         ctx.scope = global_scope
         self.current_scope = global_scope
 
@@ -53,7 +96,7 @@ class DefineScopesAndSymbols(NimbleListener):
                            'this implementation does not support function calls')
 
     def enterMain(self, ctx: NimbleParser.MainContext):
-        main_scope = Scope('$main', PrimitiveType.Void, self.current_scope)
+        main_scope = Scope('$main', _VOID, self.current_scope)
         ctx.scope = main_scope
         self.current_scope = main_scope
 
@@ -69,9 +112,9 @@ class DefineScopesAndSymbols(NimbleListener):
         return False
 
     def exitVarDec(self, ctx: NimbleParser.VarDecContext):
-        name = ctx.ID().getText()
+        name = ctx.var_name = ctx.ID().getText()
+        _type = ctx.declared_type = PrimitiveType[ctx.TYPE().getText()]
         if not self.duplicate_name(ctx, name):
-            _type = PrimitiveType[ctx.TYPE().getText()]
             self.current_scope.define(name, _type)
 
 
@@ -80,9 +123,23 @@ class InferTypesAndCheckConstraints(NimbleListener):
     def __init__(self, error_log: ErrorLog):
         self.error_log = error_log
         self.current_scope = None
+        self._resolve_cache = {}
+
+    def _resolve(self, name):
+        """
+        Resolves name in the current scope, memoizing found symbols by (scope, name).
+        Misses aren't cached, since a name may still be defined later in the same walk.
+        """
+        key = (id(self.current_scope), name)
+        symbol = self._resolve_cache.get(key)
+        if symbol is None:
+            symbol = self.current_scope.resolve(name)
+            if symbol is not None:
+                self._resolve_cache[key] = symbol
+        return symbol
 
     def enterScript(self, ctx: NimbleParser.ScriptContext):
-        self.current_scope = self.current_scope.enclosing_scope
+        self.current_scope = ctx.scope
 
     def enterMain(self, ctx: NimbleParser.MainContext):
         self.current_scope = ctx.scope
@@ -92,7 +149,8 @@ class InferTypesAndCheckConstraints(NimbleListener):
 
     def exitReturn(self, ctx: NimbleParser.ReturnContext):
         required_type = self.current_scope.return_type
-        returned_type = ctx.expr().type if ctx.expr() else PrimitiveType.Void
+        expr = ctx.expr()
+        returned_type = expr.type if expr else _VOID
         if required_type != returned_type:
             self.error_log.add(ctx, Category.INVALID_RETURN,
                                f'Required to return {required_type}, returns {returned_type}')
@@ -103,9 +161,10 @@ class InferTypesAndCheckConstraints(NimbleListener):
                            f"{var_name} of type {_type}")
 
     def exitVarDec(self, ctx: NimbleParser.VarDecContext):
-        _type = PrimitiveType[ctx.TYPE().getText()]
-        if ctx.expr() and _type != ctx.expr().type:
-            self.log_invalid_assign(ctx, ctx.ID().getText(), _type)
+        _type = ctx.declared_type
+        expr = ctx.expr()
+        if expr and _type != expr.type:
+            self.log_invalid_assign(ctx, ctx.var_name, _type)
 
     # --------------------------------------------------------
     # Statements
@@ -113,7 +172,8 @@ class InferTypesAndCheckConstraints(NimbleListener):
 
     def exitAssignment(self, ctx: NimbleParser.AssignmentContext):
         name = ctx.ID().getText()
-        _type = self.current_scope.resolve(name).type
+        symbol = self._resolve(name)
+        _type = symbol.type if symbol else None
         if not _type:
             self.error_log.add(ctx, Category.UNDEFINED_NAME,
                                f'Assignment target {name} not declared')
@@ -121,9 +181,10 @@ class InferTypesAndCheckConstraints(NimbleListener):
             self.log_invalid_assign(ctx, name, _type)
 
     def check_boolean_condition(self, ctx, kind):
-        if ctx.expr().type != PrimitiveType.Bool:
+        condition_type = ctx.expr().type
+        if condition_type != _BOOL:
             self.error_log.add(ctx, Category.CONDITION_NOT_BOOL,
-                               f"{kind} condition {ctx.getText()} has type {ctx.expr().type} not Bool")
+                               f"{kind} condition {ctx.getText()} has type {condition_type} not Bool")
 
     def exitWhile(self, ctx: NimbleParser.WhileContext):
         self.check_boolean_condition(ctx, 'While')
@@ -132,7 +193,7 @@ class InferTypesAndCheckConstraints(NimbleListener):
         self.check_boolean_condition(ctx, 'If')
 
     def exitPrint(self, ctx: NimbleParser.PrintContext):
-        if ctx.expr().type == PrimitiveType.ERROR:
+        if ctx.expr().type == _ERROR:
             self.error_log.add(ctx, Category.UNPRINTABLE_EXPRESSION,
                                f"Can't print expression {ctx.getText()} as it has type ERROR")
 
@@ -144,58 +205,72 @@ class InferTypesAndCheckConstraints(NimbleListener):
     # --------------------------------------------------------
 
     def exitIntLiteral(self, ctx: NimbleParser.IntLiteralContext):
-        ctx.type = PrimitiveType.Int
+        ctx.type = _INT
 
     def exitNeg(self, ctx: NimbleParser.NegContext):
-        if ctx.op.text == '-' and ctx.expr().type == PrimitiveType.Int:
-            ctx.type = PrimitiveType.Int
-        elif ctx.op.text == '!' and ctx.expr().type == PrimitiveType.Bool:
-            ctx.type = PrimitiveType.Bool
-        else:
-            ctx.type = PrimitiveType.ERROR
+        op = ctx.op.text
+        operand_type = ctx.expr().type
+        ctx.type = _type = negation_type(op, operand_type)
+        if _type == _ERROR:
             self.error_log.add(ctx, Category.INVALID_NEGATION,
-                               f"Can't apply {ctx.op.text} to {ctx.expr().type.name}")
+                               f"Can't apply {op} to {operand_type.name}")
 
     def exitParens(self, ctx: NimbleParser.ParensContext):
         ctx.type = ctx.expr().type
 
-    def binary_on_ints(self, ctx, result_type):
-        if ctx.expr(0).type == PrimitiveType.Int and ctx.expr(1).type == PrimitiveType.Int:
-            ctx.type = result_type
-        else:
-            ctx.type = PrimitiveType.ERROR
+    def binary_op(self, ctx, int_result_type):
+        op = ctx.op.text
+        left, right = ctx.expr()
+        left_type, right_type = left.type, right.type
+        ctx.type = _type = binary_type(op, left_type, right_type, int_result_type)
+        if _type == _ERROR:
             self.error_log.add(ctx, Category.INVALID_BINARY_OP,
-                               f"Can't apply {ctx.op.text} to {ctx.expr(0).type} and {ctx.expr(1).type}")
+                               f"Can't apply {op} to {left_type} and {right_type}")
 
     def exitMulDiv(self, ctx: NimbleParser.MulDivContext):
-        self.binary_on_ints(ctx, PrimitiveType.Int)
+        self.binary_op(ctx, _INT)
 
     def exitAddSub(self, ctx: NimbleParser.AddSubContext):
-        if (ctx.op.text == '+' and
-                ctx.expr(0).type == PrimitiveType.String and
-                ctx.expr(1).type == PrimitiveType.String):
-            ctx.type = PrimitiveType.String
-        else:
-            self.binary_on_ints(ctx, PrimitiveType.Int)
+        self.binary_op(ctx, _INT)
 
     def exitCompare(self, ctx: NimbleParser.CompareContext):
-        self.binary_on_ints(ctx, PrimitiveType.Bool)
+        self.binary_op(ctx, _BOOL)
 
     def exitVariable(self, ctx: NimbleParser.VariableContext):
-        name = ctx.getText()
-        _type = self.current_scope.resolve(name).type
+        name = ctx.ID().getText()
+        symbol = self._resolve(name)
+        _type = symbol.type if symbol else None
         if not _type:
-            ctx.type = PrimitiveType.ERROR
+            ctx.type = _ERROR
             self.error_log.add(ctx, Category.UNDEFINED_NAME,
                                f'Name {name} is not declared')
         else:
             ctx.type = _type
 
     def exitStringLiteral(self, ctx: NimbleParser.StringLiteralContext):
-        ctx.type = PrimitiveType.String
+        ctx.type = _STRING
 
     def exitBoolLiteral(self, ctx: NimbleParser.BoolLiteralContext):
-        ctx.type = PrimitiveType.Bool
+        ctx.type = _BOOL
 
     def exitFuncCallExpr(self, ctx: NimbleParser.FuncCallExprContext):
         ctx.type = ctx.funcCall().type
+
+
+class SemanticPass(DefineScopesAndSymbols, InferTypesAndCheckConstraints):
+    """
+    Combines both phases of the analysis into a single listener, so the tree need only be
+    walked once. Scopes are created on entry to the script and main (as in phase 1), and
+    each variable declaration is both defined and checked on exit; all other rules are
+    handled as in phase 2. Names used in an initializer must be declared by an earlier
+    varDec (see the module docstring). This is the analysis used by the compiler and by
+    `testhelpers.do_semantic_analysis`.
+    """
+
+    def __init__(self, error_log: ErrorLog):
+        DefineScopesAndSymbols.__init__(self, error_log)
+        InferTypesAndCheckConstraints.__init__(self, error_log)
+
+    def exitVarDec(self, ctx: NimbleParser.VarDecContext):
+        DefineScopesAndSymbols.exitVarDec(self, ctx)
+        InferTypesAndCheckConstraints.exitVarDec(self, ctx)
@@ -0,0 +1,105 @@
+"""
+Checks that `generic_parser.IterativeParseTreeWalker` fires exactly the same listener
+events, in the same order, as ANTLR's recursive `ParseTreeWalker`, on a script that
+uses every rule and labelled alternative in the Nimble grammar.
+
+Run from the project root with `python -m unittest semantics.test_walker`.
+
+Version: 2026-10-15
+"""
+
+import unittest
+
+from antlr4 import ParseTreeWalker
+from generic_parser import parse, IterativeParseTreeWalker
+from nimble import NimbleLexer, NimbleParser, NimbleListener
+
+EVERY_RULE_SCRIPT = """
+func f(a : Int, b : Bool) -> Int {
+    var c : Int = a
+    if b {
+        return c
+    } else {
+        return -c
+    }
+    return 0
+}
+
+func g() {
+    print "g"
+}
+
+var x : Int = f(1, true)
+var s : String
+var ok : Bool = !false
+while x < 10 {
+    x = (x + 1) * 2 / 1 - 0
+}
+if x <= 3 == ok {
+    print s
+}
+g()
+print x
+"""
+
+RULE_METHOD_NAMES = [name for name in vars(NimbleListener)
+                     if name.startswith('enter') or name.startswith('exit')]
+
+
+class RuleEventRecorder(NimbleListener):
+    """Records every rule-specific enterX/exitX event, as (method name, node) pairs."""
+
+    def __init__(self):
+        self.events = []
+
+
+def _recording_method(name):
+    def record(self, ctx):
+        self.events.append((name, ctx))
+    return record
+
+
+for _name in RULE_METHOD_NAMES:
+    setattr(RuleEventRecorder, _name, _recording_method(_name))
+
+
+class AllEventRecorder(RuleEventRecorder):
+    """Also records the generic events, which the iterative walker skips when they're no-ops."""
+
+    def enterEveryRule(self, ctx):
+        self.events.append(('enterEveryRule', ctx))
+
+    def exitEveryRule(self, ctx):
+        self.events.append(('exitEveryRule', ctx))
+
+    def visitTerminal(self, node):
+        self.events.append(('visitTerminal', node))
+
+    def visitErrorNode(self, node):
+        self.events.append(('visitErrorNode', node))
+
+
+class IterativeWalkerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tree = parse(EVERY_RULE_SCRIPT, 'script', NimbleLexer, NimbleParser)
+
+    def events(self, walker, recorder_class):
+        recorder = recorder_class()
+        walker.walk(recorder, self.tree)
+        return recorder.events
+
+    def test_script_uses_every_rule(self):
+        called = {name for name, _ in self.events(ParseTreeWalker(), RuleEventRecorder)}
+        self.assertEqual(set(RULE_METHOD_NAMES), called)
+
+    def test_same_events_as_parse_tree_walker(self):
+        for recorder_class in (RuleEventRecorder, AllEventRecorder):
+            with self.subTest(recorder=recorder_class.__name__):
+                expected = self.events(ParseTreeWalker(), recorder_class)
+                actual = self.events(IterativeParseTreeWalker(), recorder_class)
+                self.assertEqual(expected, actual)
+
+
+if __name__ == '__main__':
+    unittest.main()
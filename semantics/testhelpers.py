@@ -14,7 +14,7 @@ from antlr4 import ParserRuleContext, ParseTreeWalker
 from generic_parser import parse
 from nimble import NimbleLexer, NimbleParser, NimbleListener
 from .errorlog import ErrorLog
-from .nimblesemantics import InferTypesAndCheckConstraints, DefineScopesAndSymbols
+from .nimblesemantics import DefineScopesAndSymbols, SemanticPass
 
 
 def do_semantic_analysis(source, start_rule_name, first_phase_only=False):
@@ -27,18 +27,20 @@ def do_semantic_analysis(source, start_rule_name, first_phase_only=False):
     - DefineScopesAndSymbols, then
     - InferTypesAndCheckConstraints
 
-    The second phase can be switched off using the first_phase_only parameter,
-    where testing just the results of the first phase is desired.
+    By default both phases are run together, using the same single-walk `SemanticPass`
+    as the compiler, so that tests check exactly the rules the compiler applies. The
+    second phase can be switched off using the first_phase_only parameter, where
+    testing just the results of the first phase is desired.
     """
 
     tree = parse(source, start_rule_name, NimbleLexer, NimbleParser)
     errors = ErrorLog()
     walker = ParseTreeWalker()
 
-    walker.walk(DefineScopesAndSymbols(errors), tree)
-
-    if not first_phase_only:
-        walker.walk(InferTypesAndCheckConstraints(errors), tree)
+    if first_phase_only:
+        walker.walk(DefineScopesAndSymbols(errors), tree)
+    else:
+        walker.walk(SemanticPass(errors), tree)
 
     type_collector = ExpressionTypeCollector()
     walker.walk(type_collector, tree)
@@ -1,18 +1,28 @@
 """
 Templates used by the nimble2MIPS.py module
 
+Each template is a function returning a list of MIPS code fragments. Arguments
+holding generated code (e.g., `expr`, `main`, `string_literals`) are themselves
+fragment lists, and are included by reference rather than copied.
+
 Authors: TODO: your names here
 
 Date: TODO: submission date here
 """
 
-script = """\
+
+# the script's fixed prolog, middle and epilog are constants, so generating a
+# script only builds a five-element list around the literals and main code
+
+_SCRIPT_PROLOG = """\
 .data
 
 true_string: .asciiz "true"
 false_string: .asciiz "false"
     
-{string_literals}
+"""
+
+_SCRIPT_MIDDLE = """
 
 .text
 
@@ -27,7 +37,9 @@ jr     $ra
 
 main: 
 
-{main}
+"""
+
+_SCRIPT_EPILOG = """
 
 halt:
 
@@ -35,30 +47,38 @@ li $v0 10
 syscall
 """
 
-add_sub = """\
-{expr0}
+
+def script(string_literals, main):
+    return [_SCRIPT_PROLOG, string_literals, _SCRIPT_MIDDLE, main, _SCRIPT_EPILOG]
+
+
+def add_sub(operation, expr0, expr1):
+    return [expr0, """
 sw     $t0 0($sp) 
 addiu  $sp $sp -4 
-{expr1}
+""", expr1, f"""
 lw     $s1 4($sp) 
 {operation}    $t0 $s1 $t0 
 addiu  $sp $sp 4
-"""
+"""]
 
-if_ = """\
-{condition}
+
+def if_(condition, true_block, endif_label):
+    return [condition, f"""
 li     $t1 0
 beq    $t0 $t1 {endif_label}
-{true_block}
+""", true_block, f"""
 {endif_label}:
-"""
+"""]
 
-print_int_or_string = """\
-{expr}
+
+def print_int_or_string(expr, service_code):
+    return [expr, f"""
 move   $a0 $t0
 li     $v0 {service_code}
 syscall
-"""
+"""]
+
 
 # for printing booleans, we want to print true/false rather than 1/0
 # so we start by loading the corresponding string address in to $a0
@@ -69,9 +89,9 @@ syscall
 # end and with unique, dynamically generated `choose_false` and
 # `end_true_false_string` labels
 
-print_bool = """\
-{expr}
+def print_bool(expr):
+    return [expr, """
 jal    true_false_string
 li     $v0 4
 syscall
-"""
+"""]